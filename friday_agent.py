@@ -0,0 +1,1624 @@
+"""
+Multi-Agent Google Workspace Assistant
+Coordinates Gmail, Google Drive, and Google Calendar operations using Google Gemini AI
+Uses REST API for Gemini (compatible with Python 3.14+)
+"""
+
+import os
+import sys
+import io
+import requests
+import json
+import random
+import logging
+import asyncio
+import socket
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson is optional; it speeds up Gemini JSON encoding/decoding and Google API response parsing when installed
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = lambda obj: json.dumps(obj).encode('utf-8')
+    _json_loads = json.loads
+
+# httpx (with h2) is optional; when installed, Google API calls share one HTTP/2 connection
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Force UTF-8 encoding for stdout to handle emojis
+# sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from config import GEMINI_API_KEY, GEMINI_API_KEYS
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from google.auth.transport.requests import Request
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.model import JsonModel
+from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload, MediaIoBaseUpload, build_http
+from google_auth_httplib2 import AuthorizedHttp
+import httplib2
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Sequence, TypedDict
+import base64
+from email.message import EmailMessage
+import time
+import re
+from collections import OrderedDict, deque
+from itertools import islice
+from concurrent.futures import Future
+from functools import cached_property, lru_cache
+import threading
+import hashlib
+
+logger = logging.getLogger(__name__)
+
+# Scopes for Google APIs
+SCOPES = [
+    'https://www.googleapis.com/auth/gmail.modify',
+    'https://www.googleapis.com/auth/drive',
+    'https://www.googleapis.com/auth/calendar'
+]
+
+# OAuth token storage, shared across agent instances in this process
+TOKEN_FILE = 'token.json'
+TOKEN_REFRESH_MARGIN = 300  # seconds
+_CRED_CACHE = {'creds': None, 'refresher': None}
+_CRED_LOCK = threading.Lock()
+
+# Gemini HTTP timeouts: (connect, read) in seconds, and the longest retry wait
+GEMINI_TIMEOUT = (3.05, 27)
+MAX_BACKOFF = 60
+
+# Connection pool for the Gemini session; FastAPI runs sync handlers on up to 40 threads
+GEMINI_POOL_CONNECTIONS = 4
+GEMINI_POOL_MAXSIZE = 40
+
+# Read timeout for Google API calls (matches googleapiclient's httplib2 default)
+GOOGLE_API_TIMEOUT = 60.0
+
+# Gmail accepts at most 100 calls per batch request
+GMAIL_BATCH_SIZE = 100
+
+# batchModify / batchDelete accept at most 1000 message IDs per call
+GMAIL_BULK_LIMIT = 1000
+
+# Calendar accepts at most 50 calls per batch request
+CALENDAR_BATCH_SIZE = 50
+
+# Separator between operation blocks when Gemini returns several calendar operations
+OP_SEPARATOR_RE = re.compile(r'^[ \t]*---[ \t]*$', re.M)
+# Only these operations can be batched; anything else goes through the single-op path
+CALENDAR_BATCH_ACTIONS = ('CREATE', 'UPDATE', 'DELETE')
+
+# Partial response masks: only the event fields the agent and dashboard read
+EVENT_LIST_FIELDS = 'items(id,summary,start,htmlLink)'
+EVENT_MUTATION_FIELDS = 'id,htmlLink'
+EVENT_SYNC_FIELDS = 'items(id,status,summary,start,end,htmlLink),nextPageToken,nextSyncToken'
+SYNC_PAGE_SIZE = 2500
+# The event mirror only covers this far ahead, so recurring events are not expanded
+# across the calendar's whole history; it is rebuilt once the window has rolled over
+SYNC_WINDOW = timedelta(days=90)
+SYNC_WINDOW_ROLLOVER = timedelta(days=1)
+
+# UTC timestamp format for Calendar API calls, and the length of events created without times
+ISO_Z_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+DEFAULT_EVENT_DURATION = timedelta(hours=1)
+
+# How long dashboard file/event lists are served from memory, in seconds
+DASHBOARD_CACHE_TTL = 30
+
+# Drive uploads are sent in resumable 1 MB chunks
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_RETRIES = 3
+
+# Partial response mask for message metadata, and how many messages EmailAgent keeps cached
+EMAIL_METADATA_FIELDS = 'id,threadId,snippet,payload/headers(name,value)'
+EMAIL_CACHE_SIZE = 256
+
+# Local keyword pre-classifier for obvious requests (skips the Gemini routing call)
+INTENT_KEYWORDS = {
+    'EMAIL': ['emails?', 'e-mails?', 'gmail', 'inbox', 'reply', 'replies'],
+    'DRIVE': ['files?', 'drive', 'upload', 'documents?', 'folders?'],
+    'CALENDAR': ['events?', 'meetings?', 'schedule', 'calendar', 'appointments?']
+}
+
+# All intents compiled into one alternation so the input is scanned once;
+# the named group that matched tells us which intent it belongs to
+ROUTING_RE = re.compile(
+    r'\b(?:' + '|'.join(f"(?P<{intent}>{'|'.join(kws)})" for intent, kws in INTENT_KEYWORDS.items()) + r')\b',
+    re.I
+)
+
+# "How do I ..." style questions are usually chat, so let Gemini decide those
+CHAT_QUESTION_RE = re.compile(r'^\s*(how|why)\b', re.I)
+
+# "key: value" lines in the specialized agents' Gemini responses
+PARAM_RE = re.compile(r'^[ \t]*([A-Za-z_][A-Za-z_0-9]*)[ \t]*:[ \t]*(.*?)[ \t\r]*$', re.M)
+
+ROUTING_LABELS = ('EMAIL', 'DRIVE', 'CALENDAR', 'CHAT')
+ROUTING_STOPWORDS = {'a', 'an', 'the', 'my', 'me', 'please', 'can', 'you', 'to', 'for', 'of'}
+ROUTING_CACHE_SIZE = 512
+
+# Conversation turns kept in memory, and how many of them go into each prompt
+CHAT_HISTORY_SIZE = 32
+HISTORY_CONTEXT_TURNS = 3
+
+def _recent_turns(history: Sequence[Dict], n: int = HISTORY_CONTEXT_TURNS):
+    """Iterate over the last n conversation turns without copying the history"""
+    return islice(history, max(0, len(history) - n), None)
+
+def _iso_z(dt: datetime) -> str:
+    """Format a naive UTC datetime as an RFC 3339 timestamp with a Z suffix"""
+    return dt.strftime(ISO_Z_FORMAT)
+
+def _event_time(when: Dict[str, str]) -> datetime:
+    """Turn a Calendar start/end object into an aware datetime (all-day events start at midnight UTC)"""
+    if 'dateTime' in when:
+        return datetime.fromisoformat(when['dateTime'].replace('Z', '+00:00'))
+    return datetime.fromisoformat(when['date']).replace(tzinfo=timezone.utc)
+
+@lru_cache(maxsize=256)
+def _ensure_z(timestamp: str) -> str:
+    """Mark an ISO timestamp as UTC by appending Z if it isn't already"""
+    return timestamp if timestamp.endswith('Z') else timestamp + 'Z'
+
+def _expires_soon(creds) -> bool:
+    """Whether credentials expire within TOKEN_REFRESH_MARGIN"""
+    return bool(creds and creds.expiry and
+                creds.expiry - datetime.utcnow() < timedelta(seconds=TOKEN_REFRESH_MARGIN))
+
+def _save_token(creds):
+    """Write the token atomically so a crash never leaves a half-written file"""
+    tmp_file = TOKEN_FILE + '.tmp'
+    with open(tmp_file, 'w') as token:
+        token.write(creds.to_json())
+    os.replace(tmp_file, TOKEN_FILE)
+
+def _refresh_credentials_loop():
+    """Refresh the shared credentials shortly before they expire"""
+    while True:
+        creds = _CRED_CACHE['creds']
+        wait = 60
+        if creds.expiry:
+            remaining = (creds.expiry - datetime.utcnow()).total_seconds()
+            wait = max(60, remaining - TOKEN_REFRESH_MARGIN)
+        time.sleep(wait)
+        
+        with _CRED_LOCK:
+            creds = _CRED_CACHE['creds']
+            if creds.valid and not _expires_soon(creds):
+                continue
+            try:
+                print("[INFO] Refreshing credentials in the background...", flush=True)
+                creds.refresh(Request())
+                _save_token(creds)
+            except Exception as e:
+                print(f"[WARN] Background credential refresh failed: {e}", flush=True)
+
+class AgentResponse(TypedDict):
+    """Reply text plus the rich-card hint the web UI renders alongside it"""
+    text: str
+    card_type: Optional[str]
+    card_data: Dict[str, Any]
+
+class _TTLCache:
+    """Small thread-safe cache whose entries expire after ttl seconds"""
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                return None
+            return entry[1]
+    
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class _HttpxTransport:
+    """httplib2-compatible transport that sends requests through an HTTP/2 httpx.Client.
+    
+    The client is thread-safe and multiplexes concurrent requests from every
+    thread over a single connection per host.
+    """
+    
+    def __init__(self, client):
+        self._client = client
+        self.timeout = client.timeout.read
+    
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None, **kwargs):
+        # Redirects are not followed: googleapiclient expects resumable uploads to
+        # hand back 308 rather than chase it, as its httplib2 setup does.
+        # Transport errors are re-raised as the types googleapiclient retries on
+        if hasattr(body, 'read'):
+            # Resumable upload chunks arrive as file-like stream slices
+            body = body.read()
+        try:
+            response = self._client.request(
+                method,
+                uri,
+                content=body,
+                headers=headers,
+                follow_redirects=False
+            )
+        except httpx.TimeoutException as e:
+            raise socket.timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise ConnectionError(str(e)) from e
+        info = dict(response.headers.items())
+        info['status'] = str(response.status_code)
+        info['reason'] = response.reason_phrase
+        return httplib2.Response(info), response.content
+    
+    def close(self):
+        self._client.close()
+
+class _ThreadLocalHttp:
+    """Authorized httplib2 transport shared by every Google API client (used without httpx).
+    
+    httplib2.Http is not thread-safe, so each thread gets its own pooled
+    connection set; within a thread, Gmail, Drive and Calendar calls all
+    reuse the same keep-alive connections.
+    """
+    
+    def __init__(self, creds):
+        self.credentials = creds
+        self._local = threading.local()
+    
+    @property
+    def _http(self):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self.credentials, http=build_http())
+        return http
+    
+    def request(self, *args, **kwargs):
+        return self._http.request(*args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self._http, name)
+
+@lru_cache(maxsize=None)
+def _authorized_http(creds):
+    """Process-wide HTTP transport for the given credentials"""
+    if httpx is not None:
+        try:
+            client = httpx.Client(
+                http2=True,
+                timeout=httpx.Timeout(GOOGLE_API_TIMEOUT, connect=10.0),
+                limits=httpx.Limits(max_keepalive_connections=10)
+            )
+            return AuthorizedHttp(creds, http=_HttpxTransport(client))
+        except ImportError:
+            # httpx is installed without the h2 package
+            pass
+    return _ThreadLocalHttp(creds)
+
+class _FastJsonModel(JsonModel):
+    """googleapiclient JSON model that parses responses through orjson when available
+    
+    Request bodies keep the stdlib JsonModel serializer: googleapiclient sizes
+    Content-Length by string length, so bodies must stay ASCII-escaped.
+    """
+    
+    def deserialize(self, content):
+        try:
+            body = _json_loads(content)
+        except ValueError:
+            return content.decode('utf-8') if isinstance(content, bytes) else content
+        if self._data_wrapper and 'data' in body:
+            body = body['data']
+        return body
+
+@lru_cache(maxsize=None)
+def _build_service(name: str, version: str, creds):
+    """Build a Google API client once per process from the bundled discovery document"""
+    return build(name, version, http=_authorized_http(creds), model=_FastJsonModel(), static_discovery=True)
+
+class GeminiRESTClient:
+    """REST API client for Gemini with automatic API key rotation"""
+    def __init__(self, api_keys: list, model_name: str = "gemini-2.5-flash"):
+        # Support both single key (string) and multiple keys (list)
+        if isinstance(api_keys, str):
+            self.api_keys = [api_keys]
+        else:
+            self.api_keys = api_keys
+        
+        self.current_key_index = 0
+        self.model_name = model_name
+        self.base_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent"
+        self.stream_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:streamGenerateContent"
+        
+        # Reuse one session so calls keep the TCP+TLS connection alive
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        # Pool sized for concurrent /chat worker threads. Transport-level retries
+        # cover failed connects and transient 5xx; 429 and 503 are handled in
+        # _generate_content so quota errors can still rotate keys
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=GEMINI_POOL_CONNECTIONS,
+            pool_maxsize=GEMINI_POOL_MAXSIZE,
+            max_retries=Retry(
+                total=3,
+                connect=2,
+                read=0,
+                status=2,
+                backoff_factor=0.3,
+                status_forcelist=[500, 502, 504],
+                allowed_methods=['POST'],
+                raise_on_status=False
+            )
+        ))
+        
+        # Identical prompts issued concurrently share a single API call
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+    
+    def close(self):
+        """Close pooled HTTP connections"""
+        self.session.close()
+    
+    def _backoff_delay(self, attempt: int, response=None) -> float:
+        """Exponential backoff with jitter, honoring the server's Retry-After"""
+        retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+        delay = int(retry_after) if retry_after.isdigit() else 2 ** (attempt + 1)
+        return min(MAX_BACKOFF, delay) + random.uniform(0, 1)
+    
+    def _get_current_key(self):
+        """Get the current API key"""
+        return self.api_keys[self.current_key_index]
+    
+    def _rotate_key(self):
+        """Switch to the next API key"""
+        if self.current_key_index < len(self.api_keys) - 1:
+            self.current_key_index += 1
+            print(f"[KEY ROTATION] Switching to API key #{self.current_key_index + 1}", flush=True)
+            return True
+        else:
+            print(f"[ERROR] All {len(self.api_keys)} API keys exhausted!", flush=True)
+            return False
+    
+    def generate_content(self, prompt: str):
+        """Generate content, coalescing concurrent calls with the same prompt"""
+        key = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        
+        with self._inflight_lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                future = Future()
+                self._inflight[key] = future
+        
+        if pending is not None:
+            print("[DEBUG] Waiting on identical in-flight request", flush=True)
+            return pending.result()
+        
+        try:
+            response = self._generate_content(prompt)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+    
+    def stream_generate(self, prompt: str):
+        """Yield response text chunks as Gemini produces them (server-sent events)"""
+        payload = {
+            "contents": [{
+                "parts": [{"text": prompt}]
+            }]
+        }
+        
+        emitted = ""
+        try:
+            with self.session.post(
+                self.stream_url,
+                params={"key": self._get_current_key(), "alt": "sse"},
+                data=_json_dumps(payload),
+                timeout=GEMINI_TIMEOUT,
+                stream=True
+            ) as response:
+                if response.status_code == 200:
+                    for line in response.iter_lines(decode_unicode=True):
+                        if not line or not line.startswith("data:"):
+                            continue
+                        chunk = _json_loads(line[len("data:"):])
+                        for candidate in chunk.get('candidates', [])[:1]:
+                            for part in candidate.get('content', {}).get('parts', []):
+                                if part.get('text'):
+                                    emitted += part['text']
+                                    yield part['text']
+                    return
+                reason = response.status_code
+        except requests.exceptions.RequestException as e:
+            reason = e
+        
+        # Let the regular path handle key rotation and retries
+        print(f"[WARN] Streaming failed ({reason}), falling back to regular request", flush=True)
+        text = self.generate_content(prompt).text
+        # Don't repeat what was already streamed before the connection dropped
+        yield text[len(emitted):] if text.startswith(emitted) else text
+    
+    def _generate_content(self, prompt: str):
+        """Generate content using REST API with automatic key rotation"""
+        max_retries = 5  # Increased from 3 to handle server overload
+        print(f"[DEBUG] Generating content via REST API (Key #{self.current_key_index + 1})...", flush=True)
+        
+        for attempt in range(max_retries):
+            try:
+                print(f"[DEBUG] Attempt {attempt+1}", flush=True)
+                
+                payload = {
+                    "contents": [{
+                        "parts": [{"text": prompt}]
+                    }]
+                }
+                
+                response = self.session.post(
+                    self.base_url,
+                    params={"key": self._get_current_key()},
+                    data=_json_dumps(payload),
+                    timeout=GEMINI_TIMEOUT
+                )
+                
+                if response.status_code == 200:
+                    result = _json_loads(response.content)
+                    # Extract text from response
+                    text = result['candidates'][0]['content']['parts'][0]['text']
+                    print("[DEBUG] Generation successful", flush=True)
+                    
+                    # Create response object that mimics genai response
+                    class Response:
+                        def __init__(self, txt):
+                            self.text = txt
+                    
+                    return Response(text)
+                    
+                elif response.status_code == 429:
+                    # Check if it's a quota exhaustion error
+                    error_text = response.text
+                    if "quota" in error_text.lower() or "RESOURCE_EXHAUSTED" in error_text:
+                        print(f"[WARN] API Key #{self.current_key_index + 1} quota exhausted!", flush=True)
+                        # Try to rotate to next key
+                        if self._rotate_key():
+                            print("[INFO] Retrying with new API key...", flush=True)
+                            continue  # Retry immediately with new key
+                        else:
+                            raise Exception(f"All API keys exhausted: {response.text}")
+                    else:
+                        # Regular rate limit, wait and retry
+                        if attempt < max_retries - 1:
+                            wait_time = self._backoff_delay(attempt, response)
+                            print(f"[WARN] Rate limit hit. Retrying in {wait_time:.1f} seconds... (Attempt {attempt+1}/{max_retries})", flush=True)
+                            time.sleep(wait_time)
+                            continue
+                        raise Exception(f"Rate limit exceeded: {response.text}")
+                        
+                elif response.status_code == 503:
+                    if attempt < max_retries - 1:
+                        wait_time = self._backoff_delay(attempt, response)
+                        print(f"[WARN] Model overloaded (503). Retrying in {wait_time:.1f} seconds... (Attempt {attempt+1}/{max_retries})", flush=True)
+                        time.sleep(wait_time)
+                        continue
+                    raise Exception(f"Model overloaded after {max_retries} attempts: {response.text}")
+                else:
+                    raise Exception(f"API Error {response.status_code}: {response.text}")
+                    
+            except requests.exceptions.RequestException as e:
+                print(f"[DEBUG] Network error: {e}", flush=True)
+                if attempt < max_retries - 1:
+                    wait_time = self._backoff_delay(attempt)
+                    print(f"[WARN] Retrying in {wait_time:.1f} seconds... (Attempt {attempt+1}/{max_retries})", flush=True)
+                    time.sleep(wait_time)
+                    continue
+                raise Exception(f"Network error: {str(e)}")
+        
+        raise Exception("Max retries exceeded")
+
+class GoogleWorkspaceAgent:
+    """Main coordinator agent for Google Workspace operations"""
+    
+    def __init__(self):
+        self.creds = self._get_credentials()
+        
+        # Initialize Gemini REST API client with multiple keys for rotation
+        self.model = GeminiRESTClient(GEMINI_API_KEYS, "gemini-2.5-flash")
+        self.chat_history = deque(maxlen=CHAT_HISTORY_SIZE)
+        self._route_cache = OrderedDict()
+        # server.py runs concurrent /chat requests on worker threads against one agent
+        self._state_lock = threading.Lock()
+    
+    # Services and specialized agents are built on first use, so a session
+    # that only touches one of them never pays for the others
+    @cached_property
+    def gmail_service(self):
+        return _build_service('gmail', 'v1', self.creds)
+    
+    @cached_property
+    def drive_service(self):
+        return _build_service('drive', 'v3', self.creds)
+    
+    @cached_property
+    def calendar_service(self):
+        return _build_service('calendar', 'v3', self.creds)
+    
+    @cached_property
+    def email_agent(self):
+        return EmailAgent(self.gmail_service, self.model)
+    
+    @cached_property
+    def drive_agent(self):
+        return DriveAgent(self.drive_service, self.model)
+    
+    @cached_property
+    def calendar_agent(self):
+        return CalendarAgent(self.calendar_service, self.model)
+    
+    def _get_credentials(self):
+        """Authenticate and get credentials for Google APIs"""
+        # One lock for the whole process so concurrent agents never refresh twice
+        with _CRED_LOCK:
+            creds = _CRED_CACHE['creds']
+            
+            # Check if we have saved credentials
+            if creds is None and os.path.exists(TOKEN_FILE):
+                creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+            
+            # Refresh a little ahead of expiry so the first API call doesn't stall on it
+            expiring = _expires_soon(creds)
+            
+            # If no valid credentials, authenticate
+            if not creds or not creds.valid or expiring:
+                if creds and creds.refresh_token and (creds.expired or expiring):
+                    print("Refreshing expired credentials...", flush=True)
+                    creds.refresh(Request())
+                else:
+                    print("Starting OAuth authentication...", flush=True)
+                    print("A browser window will open for authentication.", flush=True)
+                    flow = InstalledAppFlow.from_client_secrets_file(
+                        'credentials.json', SCOPES)
+                    creds = flow.run_local_server(port=0)
+                    print("[OK] Authentication successful!", flush=True)
+                
+                # Save credentials for future use
+                _save_token(creds)
+            
+            # Share credentials with any other agent in this process
+            _CRED_CACHE['creds'] = creds
+            
+            # Keep the token fresh in the background from now on
+            if _CRED_CACHE['refresher'] is None and creds.refresh_token:
+                _CRED_CACHE['refresher'] = threading.Thread(target=_refresh_credentials_loop, daemon=True)
+                _CRED_CACHE['refresher'].start()
+        
+        return creds
+    
+    def _normalize_input(self, user_input: str) -> str:
+        """Normalize user input into a routing cache key"""
+        words = re.findall(r'[a-z0-9@.]+', user_input.lower())
+        return " ".join(w for w in words if w not in ROUTING_STOPWORDS)
+    
+    def _route(self, user_input: str, history_context: str) -> str:
+        """Classify a request as EMAIL, DRIVE, CALENDAR or CHAT"""
+        # Fast path: exactly one service is clearly mentioned
+        if not CHAT_QUESTION_RE.match(user_input):
+            matches = {m.lastgroup for m in ROUTING_RE.finditer(user_input)}
+            if len(matches) == 1:
+                return matches.pop()
+        
+        # With history, the label can depend on the conversation ("delete the last one"),
+        # so only standalone requests are cached
+        key = self._normalize_input(user_input) if not history_context else None
+        if key is not None:
+            with self._state_lock:
+                if key in self._route_cache:
+                    self._route_cache.move_to_end(key)
+                    return self._route_cache[key]
+        
+        system_prompt = f"""You are a helpful AI assistant named Friday.
+        You coordinate specialized agents for Gmail, Google Drive, and Google Calendar, but you can also chat normally.
+        
+        Recent Conversation:
+        {history_context}
+
+        Analyze this request: "{user_input}"
+        
+        Determine the best way to handle it:
+        - EMAIL: If the user wants to send, read, or manage emails.
+        - DRIVE: If the user wants to create, search, or manage files.
+        - CALENDAR: If the user wants to schedule or check events.
+        - CHAT: If the user is asking a general question, saying hello, or asking about your capabilities.
+        
+        Respond with ONLY ONE WORD: EMAIL, DRIVE, CALENDAR, or CHAT"""
+        
+        # Only the label matters, so stop collecting text once one shows up. The rest
+        # of the stream is still drained so its connection goes back to the pool
+        agent_type = ""
+        for chunk in self.model.stream_generate(system_prompt):
+            if not any(label in agent_type for label in ROUTING_LABELS):
+                agent_type += chunk.upper()
+        agent_type = agent_type.strip()
+        
+        if key is not None:
+            with self._state_lock:
+                self._route_cache[key] = agent_type
+                if len(self._route_cache) > ROUTING_CACHE_SIZE:
+                    self._route_cache.popitem(last=False)
+        return agent_type
+    
+    def process_request(self, user_input: str) -> AgentResponse:
+        """Main coordinator that routes requests to specialized agents"""
+        
+        # Prepare history context once; the router and specialized agents share it
+        with self._state_lock:
+            history_context = "".join(
+                f"User: {turn['user']}\nAssistant: {turn['assistant']}\n"
+                for turn in _recent_turns(self.chat_history)
+            )
+
+        try:
+            # Determine which agent to use
+            print(f"[DEBUG] Routing request: {user_input}", flush=True)
+            agent_type = self._route(user_input, history_context)
+            
+            print(f"[TARGET] Routing to: {agent_type} agent", flush=True)
+            
+            # Route to appropriate agent
+            if 'EMAIL' in agent_type:
+                result = self.email_agent.process(user_input, history_context)
+            elif 'DRIVE' in agent_type:
+                result = self.drive_agent.process(user_input, history_context)
+            elif 'CALENDAR' in agent_type:
+                result = self.calendar_agent.process(user_input, history_context)
+            else:
+                # General Chat Mode
+                chat_prompt = f"""You are Friday, a helpful AI assistant.
+                
+                Recent Conversation:
+                {history_context}
+                
+                The user said: "{user_input}"
+                
+                Respond naturally and helpfully. If they asked how to do something (like "how do I format files"), explain it to them.
+                Do not try to execute commands, just chat."""
+                
+                chat_response = self.model.generate_content(chat_prompt)
+                result = {'text': chat_response.text, 'card_type': None, 'card_data': {}}
+            
+            with self._state_lock:
+                self.chat_history.append({'user': user_input, 'assistant': result['text']})
+            return result
+        
+        except Exception as e:
+            return {'text': f"[ERROR] Error processing request: {str(e)}", 'card_type': None, 'card_data': {}}
+
+
+class BaseAgent:
+    """Shared helpers for the specialized agents"""
+    
+    # Which actions produce a rich card in the web UI
+    CARD_TYPES: Dict[str, str] = {}
+    
+    def _respond(self, action: str, text: str) -> AgentResponse:
+        """Wrap an action's result text with the card type the frontend should show"""
+        card_type = None
+        if not text.startswith(('[ERROR]', '[EMPTY]')):
+            card_type = self.CARD_TYPES.get(action)
+        return {'text': text, 'card_type': card_type, 'card_data': {}}
+    
+    def _parse_response(self, text: str) -> Dict[str, str]:
+        """Parse AI response into parameters"""
+        return dict(PARAM_RE.findall(text))
+
+
+class EmailAgent(BaseAgent):
+    """Specialized agent for Gmail operations"""
+    
+    CARD_TYPES = {'LIST': 'email_list', 'READ': 'email_list'}
+    
+    def __init__(self, gmail_service, model):
+        self.service = gmail_service
+        self.model = model
+        
+        # Recently fetched messages by ID: repeated READs of a message and
+        # REPLY to a message from the last LIST skip a refetch
+        self._metadata_cache = OrderedDict()
+        self._message_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    def _remember(self, cache: OrderedDict, msg_id: str, data: Dict[str, Any]):
+        """Store a message in a bounded LRU cache"""
+        with self._cache_lock:
+            cache[msg_id] = data
+            cache.move_to_end(msg_id)
+            if len(cache) > EMAIL_CACHE_SIZE:
+                cache.popitem(last=False)
+    
+    def _recall(self, cache: OrderedDict, msg_id: str):
+        """Look up a message in a bounded LRU cache"""
+        with self._cache_lock:
+            if msg_id not in cache:
+                return None
+            cache.move_to_end(msg_id)
+            return cache[msg_id]
+    
+    def _get_metadata(self, message_id: str) -> Dict[str, Any]:
+        """Get a message's ID, thread, snippet and key headers, from cache when possible"""
+        msg_data = self._recall(self._metadata_cache, message_id)
+        if msg_data is not None:
+            return msg_data
+        
+        msg_data = self._metadata_request(message_id).execute()
+        self._remember(self._metadata_cache, message_id, msg_data)
+        return msg_data
+    
+    def _metadata_request(self, message_id: str):
+        """Build a partial-response get() for just the fields the agent displays"""
+        return self.service.users().messages().get(
+            userId='me',
+            id=message_id,
+            format='metadata',
+            metadataHeaders=['From', 'Subject', 'Date'],
+            fields=EMAIL_METADATA_FIELDS
+        )
+    
+    def process(self, request: str, history_context: str) -> AgentResponse:
+        """Process email-related requests"""
+        
+        system_prompt = f"""You are an Email Agent specialized in Gmail operations.
+        
+        Recent Conversation (Use this to resolve references like "those emails" or "the last one"):
+        {history_context}
+        
+        Analyze this request: "{request}"
+        
+        Determine the action and extract parameters:
+        - Actions: SEND, READ, DELETE, MARK_READ, MARK_UNREAD, REPLY, LIST
+        - For SEND: extract 'to' (email), 'subject', 'message'
+        - For READ/DELETE/MARK: extract 'message_id'. If multiple, separate with commas. If referring to previously listed emails, extract their IDs from history.
+        - For REPLY: extract 'message_id' and 'message'
+        - For LIST: no parameters needed
+        
+        Respond in this exact format:
+        ACTION: <action>
+        to: <email>
+        subject: <subject>
+        message: <message>
+        message_id: <id or comma-separated ids>
+        
+        Only include relevant parameters."""
+        
+        try:
+            response = self.model.generate_content(system_prompt)
+            parsed = self._parse_response(response.text)
+            
+            action = parsed.get('ACTION', '').upper()
+            
+            if action in ('READ', 'DELETE', 'MARK_READ', 'MARK_UNREAD', 'REPLY') and 'NEED_ID' in parsed.get('message_id', ''):
+                return self._respond('', "Please provide the message ID or use 'list emails' first.")
+            
+            if action == 'SEND':
+                text = self.send_email(
+                    parsed.get('to', ''),
+                    parsed.get('subject', 'No Subject'),
+                    parsed.get('message', '')
+                )
+            elif action == 'LIST':
+                text = self.list_emails()
+            elif action == 'READ':
+                text = self.get_email(parsed.get('message_id'))
+            elif action == 'DELETE':
+                text = self.delete_email(parsed.get('message_id'))
+            elif action == 'MARK_READ':
+                text = self.mark_as_read(parsed.get('message_id'))
+            elif action == 'MARK_UNREAD':
+                text = self.mark_as_unread(parsed.get('message_id'))
+            elif action == 'REPLY':
+                text = self.reply_to_email(parsed.get('message_id'), parsed.get('message', ''))
+            else:
+                text = "I couldn't understand that email request. Try: 'send email', 'list emails', etc."
+            
+            return self._respond(action, text)
+        
+        except Exception as e:
+            return self._respond('', f"[ERROR] Error processing email request: {str(e)}")
+    
+    def list_emails(self, max_results: int = 10) -> str:
+        """List recent emails"""
+        try:
+            results = self.service.users().messages().list(
+                userId='me',
+                maxResults=max_results,
+                fields='messages(id),nextPageToken'
+            ).execute()
+            
+            messages = results.get('messages', [])
+            
+            if not messages:
+                return "[EMPTY] No emails found."
+            
+            # Fetch all message headers in one batched round trip instead of one call per message
+            metadata = {}
+            
+            def on_message(request_id, msg_data, exception):
+                if exception is None:
+                    metadata[request_id] = msg_data
+                    self._remember(self._metadata_cache, request_id, msg_data)
+            
+            for i in range(0, len(messages), GMAIL_BATCH_SIZE):
+                batch = self.service.new_batch_http_request(callback=on_message)
+                for msg in messages[i:i + GMAIL_BATCH_SIZE]:
+                    batch.add(self._metadata_request(msg['id']), request_id=msg['id'])
+                batch.execute()
+            
+            parts = [f"[EMAIL] Found {len(messages)} recent emails:\n\n"]
+            
+            for msg in messages:
+                msg_data = metadata.get(msg['id'])
+                if msg_data is None:
+                    continue
+                
+                headers = {h['name']: h['value'] for h in msg_data['payload']['headers']}
+                
+                parts.append(
+                    f"ID: {msg['id']}\n"
+                    f"From: {headers.get('From', 'Unknown')}\n"
+                    f"Subject: {headers.get('Subject', 'No Subject')}\n"
+                    f"Date: {headers.get('Date', 'Unknown')}\n"
+                    + "-" * 50 + "\n"
+                )
+            
+            return "".join(parts)
+        
+        except Exception as e:
+            return f"[ERROR] Error listing emails: {str(e)}"
+    
+    def send_email(self, to: str, subject: str, body: str) -> str:
+        """Send an email"""
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                message = EmailMessage()
+                message['To'] = to
+                message['Subject'] = subject
+                message.set_content(body)
+                raw = base64.urlsafe_b64encode(bytes(message)).decode('ascii')
+                
+                self.service.users().messages().send(
+                    userId='me',
+                    body={'raw': raw}
+                ).execute()
+                
+                return f"[OK] Email sent successfully to {to}\nSubject: {subject}"
+            except Exception as e:
+                # If it's a connection error and we have retries left, wait and retry
+                if ("10053" in str(e) or "10054" in str(e)) and attempt < max_retries - 1:
+                    print(f"[WARN] Connection error sending email (attempt {attempt+1}/{max_retries}). Retrying...", flush=True)
+                    time.sleep(2)
+                    continue
+                return f"[ERROR] Error sending email: {str(e)}"
+    
+    def get_email(self, message_id: str) -> str:
+        """Get email details"""
+        try:
+            msg = self._recall(self._message_cache, message_id)
+            if msg is None:
+                msg = self.service.users().messages().get(
+                    userId='me',
+                    id=message_id,
+                    format='full',
+                    fields='id,payload(headers,body/data,parts(mimeType,body/data))'
+                ).execute()
+                self._remember(self._message_cache, message_id, msg)
+            
+            headers = {h['name']: h['value'] for h in msg['payload']['headers']}
+            
+            # Get email body
+            parts = msg['payload'].get('parts', [])
+            body = msg['payload'].get('body', {}).get('data', '')
+            
+            if parts:
+                for part in parts:
+                    if part['mimeType'] == 'text/plain':
+                        body = part['body'].get('data', '')
+                        break
+            
+            if body:
+                body = base64.urlsafe_b64decode(body).decode('utf-8')
+            
+            return "".join([
+                "[EMAIL] Email Details:\n\n",
+                f"From: {headers.get('From', 'Unknown')}\n",
+                f"To: {headers.get('To', 'Unknown')}\n",
+                f"Subject: {headers.get('Subject', 'No Subject')}\n",
+                f"Date: {headers.get('Date', 'Unknown')}\n",
+                f"\nBody:\n{body[:500]}..."  # First 500 chars
+            ])
+        except Exception as e:
+            return f"[ERROR] Error getting email: {str(e)}"
+    
+    def _split_ids(self, message_ids: str) -> List[str]:
+        """Split a comma-separated ID list, dropping blanks and duplicates"""
+        return list(dict.fromkeys(id for id in (part.strip() for part in message_ids.split(',')) if id))
+    
+    def _id_chunks(self, ids: List[str]):
+        """Yield ID lists small enough for a single batchModify/batchDelete call"""
+        for i in range(0, len(ids), GMAIL_BULK_LIMIT):
+            yield ids[i:i + GMAIL_BULK_LIMIT]
+    
+    def delete_email(self, message_ids: str) -> str:
+        """Delete one or more emails"""
+        ids = self._split_ids(message_ids)
+        try:
+            for chunk in self._id_chunks(ids):
+                self.service.users().messages().batchDelete(
+                    userId='me',
+                    body={'ids': chunk}
+                ).execute()
+            with self._cache_lock:
+                for msg_id in ids:
+                    self._metadata_cache.pop(msg_id, None)
+                    self._message_cache.pop(msg_id, None)
+            return f"[OK] {len(ids)} email(s) deleted: {', '.join(ids)}"
+        except Exception as e:
+            return f"[ERROR] Failed to delete emails: {str(e)}"
+    
+    def _modify_labels(self, message_ids: str, body: Dict[str, List[str]], state: str) -> str:
+        """Apply a label change to one or more emails"""
+        ids = self._split_ids(message_ids)
+        try:
+            for chunk in self._id_chunks(ids):
+                self.service.users().messages().batchModify(
+                    userId='me',
+                    body={'ids': chunk, **body}
+                ).execute()
+            return f"[OK] {len(ids)} email(s) marked as {state}: {', '.join(ids)}"
+        except Exception as e:
+            return f"[ERROR] Failed to mark emails: {str(e)}"
+    
+    def mark_as_read(self, message_ids: str) -> str:
+        """Mark one or more emails as read"""
+        return self._modify_labels(message_ids, {'removeLabelIds': ['UNREAD']}, "read")
+    
+    def mark_as_unread(self, message_ids: str) -> str:
+        """Mark one or more emails as unread"""
+        return self._modify_labels(message_ids, {'addLabelIds': ['UNREAD']}, "unread")
+    
+    def reply_to_email(self, message_id: str, reply_text: str) -> str:
+        """Reply to an email"""
+        try:
+            original = self._get_metadata(message_id)
+            
+            headers = {h['name']: h['value'] for h in original['payload']['headers']}
+            
+            message = EmailMessage()
+            message['To'] = headers.get('From', '')
+            message['Subject'] = 'Re: ' + headers.get('Subject', '')
+            message.set_content(reply_text)
+            raw = base64.urlsafe_b64encode(bytes(message)).decode('ascii')
+            
+            self.service.users().messages().send(
+                userId='me',
+                body={'raw': raw, 'threadId': original['threadId']}
+            ).execute()
+            
+            return f"[OK] Reply sent successfully to {headers.get('From', 'recipient')}"
+        except Exception as e:
+            return f"[ERROR] Error replying: {str(e)}"
+
+
+class DriveAgent(BaseAgent):
+    """Specialized agent for Google Drive operations"""
+    
+    CARD_TYPES = {'CREATE': 'drive_file', 'SEARCH': 'drive_file', 'LIST': 'drive_file'}
+    
+    def __init__(self, drive_service, model):
+        self.service = drive_service
+        self.model = model
+        self._dashboard_cache = _TTLCache(DASHBOARD_CACHE_TTL)
+    
+    def process(self, request: str, history_context: str) -> AgentResponse:
+        """Process drive-related requests"""
+        
+        system_prompt = f"""You are a Google Drive Agent specialized in file management.
+        
+        Recent Conversation:
+        {history_context}
+        
+        Analyze this request: "{request}"
+        
+        Determine the action and extract parameters:
+        - Actions: CREATE, UPLOAD, UPDATE, SHARE, MOVE, SEARCH, DELETE, LIST
+        - For CREATE: extract 'filename' and 'content'
+        - For SEARCH: extract 'query'
+        - For DELETE/SHARE: extract 'file_id'
+        - For LIST: no parameters needed
+        
+        Respond in this exact format:
+        ACTION: <action>
+        filename: <name>
+        content: <text content>
+        query: <search term>
+        file_id: <id>
+        
+        Only include relevant parameters."""
+        
+        try:
+            response = self.model.generate_content(system_prompt)
+            parsed = self._parse_response(response.text)
+            
+            action = parsed.get('ACTION', '').upper()
+            
+            if action == 'CREATE':
+                text = self.create_file(
+                    parsed.get('filename', 'untitled.txt'),
+                    parsed.get('content', '')
+                )
+            elif action == 'SEARCH':
+                text = self.search_files(parsed.get('query', ''))
+            elif action == 'DELETE':
+                text = self.delete_file(parsed.get('file_id', ''))
+            elif action == 'SHARE':
+                text = self.share_file(parsed.get('file_id', ''))
+            elif action == 'LIST':
+                text = self.list_files()
+            else:
+                text = "I couldn't understand that drive request. Try: 'create file', 'search files', etc."
+            
+            return self._respond(action, text)
+        
+        except Exception as e:
+            return self._respond('', f"[ERROR] Error processing drive request: {str(e)}")
+    
+    def list_files(self, max_results: int = 10) -> str:
+        """List recent files"""
+        try:
+            results = self.service.files().list(
+                pageSize=max_results,
+                fields="files(id, name, mimeType, webViewLink, createdTime)"
+            ).execute()
+            
+            files = results.get('files', [])
+            
+            if not files:
+                return "[EMPTY] No files found."
+            
+            parts = [f"[FILE] Found {len(files)} files:\n\n"]
+            
+            for f in files:
+                parts.append(
+                    f"ID: {f['id']}\n"
+                    f"Name: {f['name']}\n"
+                    f"Type: {f.get('mimeType', 'Unknown')}\n"
+                    f"Link: {f.get('webViewLink', 'No link')}\n"
+                    f"Created: {f.get('createdTime', 'Unknown')}\n"
+                    + "-" * 50 + "\n"
+                )
+            
+            return "".join(parts)
+        
+        except Exception as e:
+            return f"[ERROR] Error listing files: {str(e)}"
+    
+    def create_file(self, filename: str, content: str) -> str:
+        """Create a new text file in Google Drive"""
+        try:
+            file_metadata = {'name': filename}
+            
+            # Create file with content, uploaded in resumable chunks
+            media = MediaIoBaseUpload(
+                io.BytesIO(content.encode('utf-8')),
+                mimetype='text/plain',
+                chunksize=UPLOAD_CHUNK_SIZE,
+                resumable=True
+            )
+            
+            request = self.service.files().create(
+                body=file_metadata,
+                media_body=media,
+                fields='id, name, webViewLink'
+            )
+            
+            # next_chunk retries transient 5xx/429 errors and resumes where the upload left off
+            file = None
+            while file is None:
+                status, file = request.next_chunk(num_retries=UPLOAD_RETRIES)
+            self._dashboard_cache.clear()
+            
+            return f"[OK] File '{filename}' created successfully!\n[LINK] Link: {file.get('webViewLink')}\n[ID] File ID: {file.get('id')}"
+        except Exception as e:
+            return f"[ERROR] Error creating file: {str(e)}"
+    
+    def search_files(self, query: str, full_text: bool = True) -> str:
+        """Search for files in Drive by name, and by content when full_text is set"""
+        try:
+            safe = query.replace("\\", "\\\\").replace("'", "\\'")
+            options = {}
+            if full_text:
+                # Drive returns fullText matches by relevance and rejects orderBy for them
+                q = f"(name contains '{safe}' or fullText contains '{safe}') and trashed = false"
+            else:
+                q = f"name contains '{safe}' and trashed = false"
+                options['orderBy'] = 'modifiedTime desc'
+            
+            results = self.service.files().list(
+                q=q,
+                corpora='user',
+                spaces='drive',
+                pageSize=10,
+                fields="files(id, name, mimeType, webViewLink)",
+                **options
+            ).execute()
+            
+            files = results.get('files', [])
+            if not files:
+                return f"[EMPTY] No files found matching '{query}'."
+            
+            parts = [f"[SEARCH] Found {len(files)} file(s) matching '{query}':\n\n"]
+            for f in files:
+                parts.append(
+                    f"[FILE] {f['name']}\n"
+                    f"   ID: {f['id']}\n"
+                    f"   Type: {f.get('mimeType', 'Unknown')}\n"
+                    f"   Link: {f.get('webViewLink', 'No link')}\n\n"
+                )
+            
+            return "".join(parts)
+        except Exception as e:
+            return f"[ERROR] Error searching: {str(e)}"
+    
+    def delete_file(self, file_id: str) -> str:
+        """Delete a file"""
+        try:
+            self.service.files().delete(fileId=file_id).execute()
+            self._dashboard_cache.clear()
+            return f"[OK] File {file_id} deleted successfully"
+        except Exception as e:
+            return f"[ERROR] Error deleting file: {str(e)}"
+    
+    def share_file(self, file_id: str) -> str:
+        """Share a file with anyone"""
+        try:
+            permission = {
+                'type': 'anyone',
+                'role': 'reader'
+            }
+            self.service.permissions().create(
+                fileId=file_id,
+                body=permission
+            ).execute()
+            
+            # Get file link
+            file = self.service.files().get(
+                fileId=file_id,
+                fields='webViewLink'
+            ).execute()
+            
+            return f"[OK] File shared successfully!\n[LINK] Link: {file.get('webViewLink')}"
+        except Exception as e:
+            return f"[ERROR] Error sharing file: {str(e)}"
+
+    def get_files_data(self, max_results: int = 5, fresh: bool = False) -> List[Dict[str, Any]]:
+        """Get raw file data for dashboard (cached briefly unless fresh is set)"""
+        if not fresh:
+            cached = self._dashboard_cache.get(max_results)
+            if cached is not None:
+                return cached
+        
+        try:
+            results = self.service.files().list(
+                pageSize=max_results,
+                fields="files(id, name, mimeType, webViewLink, createdTime, iconLink)",
+                orderBy="createdTime desc"
+            ).execute()
+            files = results.get('files', [])
+            self._dashboard_cache.set(max_results, files)
+            return files
+        except Exception:
+            logger.exception("fetching files failed")
+            return []
+
+
+class CalendarAgent(BaseAgent):
+    """Specialized agent for Google Calendar operations"""
+    
+    CARD_TYPES = {'CREATE': 'calendar_event', 'GET': 'calendar_event', 'LIST': 'calendar_event'}
+    
+    # All event times are sent as UTC
+    EVENT_TIME_ZONE = 'UTC'
+    
+    def __init__(self, calendar_service, model):
+        self.service = calendar_service
+        self.model = model
+        self._dashboard_cache = _TTLCache(DASHBOARD_CACHE_TTL)
+        
+        # Local mirror of the calendar kept current with sync tokens
+        self._events_cache: Dict[str, Dict[str, Any]] = {}
+        self._sync_token = None
+        self._sync_window_start: Optional[datetime] = None
+        self._sync_lock = threading.Lock()
+    
+    def process(self, request: str, history_context: str) -> AgentResponse:
+        """Process calendar-related requests"""
+        
+        current_time = datetime.utcnow().isoformat()
+        
+        system_prompt = f"""You are a Google Calendar Agent specialized in calendar management.
+        The current time (UTC) is: {current_time}
+        
+        Recent Conversation:
+        {history_context}
+        
+        Analyze this request: "{request}"
+        
+        Determine the action and extract parameters:
+        - Actions: CREATE, DELETE, UPDATE, GET, LIST
+        - For CREATE: extract 'summary', 'start' (ISO format), 'end' (ISO format)
+        - For UPDATE: extract 'event_id', and optional 'summary', 'start', 'end'
+        - For DELETE: extract 'event_id'
+        - For LIST/GET: no parameters or time range
+        
+        Respond in this exact format:
+        ACTION: <action>
+        summary: <event name>
+        start: <ISO datetime>
+        end: <ISO datetime>
+        event_id: <id>
+        
+        If the request covers several CREATE/UPDATE/DELETE operations, repeat the block
+        for each one and put a line containing only --- between blocks.
+        
+        For dates, use ISO format like: 2024-12-08T10:00:00
+        Only include relevant parameters."""
+        
+        try:
+            response = self.model.generate_content(system_prompt)
+            blocks = [self._parse_response(block) for block in OP_SEPARATOR_RE.split(response.text) if block.strip()]
+            
+            # Several mutations in one request go out as a single batched call
+            if len(blocks) > 1 and all(p.get('ACTION', '').upper() in CALENDAR_BATCH_ACTIONS for p in blocks):
+                ops = []
+                for parsed in blocks:
+                    action = parsed.get('ACTION', '').upper()
+                    ops.append({
+                        'action': action,
+                        # Only new events get a default title; updates must not rename the event
+                        'summary': parsed.get('summary', 'New Event' if action == 'CREATE' else ''),
+                        'start': parsed.get('start', ''),
+                        'end': parsed.get('end', ''),
+                        'event_id': parsed.get('event_id', '')
+                    })
+                action = 'CREATE' if any(op['action'] == 'CREATE' for op in ops) else 'BATCH'
+                return self._respond(action, "\n\n".join(self.batch_events(ops)))
+            
+            parsed = blocks[0] if blocks else {}
+            
+            action = parsed.get('ACTION', '').upper()
+            
+            if action == 'CREATE':
+                text = self.create_event(
+                    parsed.get('summary', 'New Event'),
+                    parsed.get('start', ''),
+                    parsed.get('end', '')
+                )
+            elif action == 'UPDATE':
+                text = self.update_event(
+                    parsed.get('event_id', ''),
+                    parsed.get('summary', ''),
+                    parsed.get('start', ''),
+                    parsed.get('end', '')
+                )
+            elif action == 'DELETE':
+                text = self.delete_event(parsed.get('event_id', ''))
+            elif action in ['GET', 'LIST']:
+                text = self.get_events()
+            else:
+                text = "I couldn't understand that calendar request. Try: 'create event', 'list events', etc."
+            
+            return self._respond(action, text)
+        
+        except Exception as e:
+            return self._respond('', f"[ERROR] Error processing calendar request: {str(e)}")
+    
+    def _event_time_body(self, timestamp: str) -> Dict[str, str]:
+        """Build an event start/end object"""
+        return {'dateTime': timestamp, 'timeZone': self.EVENT_TIME_ZONE}
+    
+    def _event_request(self, op: Dict[str, str]):
+        """Build the Calendar API request for a single CREATE/UPDATE/DELETE operation"""
+        action = op.get('action', '').upper()
+        
+        if action == 'CREATE':
+            start, end = op.get('start', ''), op.get('end', '')
+            # If start/end not provided, create a 1-hour event starting now
+            if not start or not end:
+                now = datetime.utcnow()
+                start = _iso_z(now)
+                end = _iso_z(now + DEFAULT_EVENT_DURATION)
+            else:
+                # Ensure ISO format with Z
+                start = _ensure_z(start)
+                end = _ensure_z(end)
+            
+            event = {
+                'summary': op.get('summary', 'New Event'),
+                'start': self._event_time_body(start),
+                'end': self._event_time_body(end)
+            }
+            return self.service.events().insert(calendarId='primary', body=event, fields=EVENT_MUTATION_FIELDS)
+        
+        if action == 'UPDATE':
+            # Patch only sends the fields being changed, so no prior get() is needed
+            event = {}
+            if op.get('summary'):
+                event['summary'] = op['summary']
+            
+            start = op.get('start', '')
+            if start:
+                start = _ensure_z(start)
+                event['start'] = self._event_time_body(start)
+            
+            end = op.get('end', '')
+            if end:
+                end = _ensure_z(end)
+                event['end'] = self._event_time_body(end)
+            
+            return self.service.events().patch(
+                calendarId='primary',
+                eventId=op.get('event_id', ''),
+                body=event,
+                fields=EVENT_MUTATION_FIELDS
+            )
+        
+        if action == 'DELETE':
+            return self.service.events().delete(
+                calendarId='primary',
+                eventId=op.get('event_id', '')
+            )
+        
+        raise ValueError(f"Unknown calendar operation: {action}")
+    
+    def _event_result(self, op: Dict[str, str], response, exception) -> str:
+        """Format the outcome of a single calendar operation"""
+        action = op.get('action', '').upper()
+        
+        if action == 'CREATE':
+            if exception is not None:
+                return f"[ERROR] Error creating event: {str(exception)}"
+            return f"[OK] Event '{op.get('summary', 'New Event')}' created successfully!\n[LINK] Link: {response.get('htmlLink')}\n[ID] Event ID: {response.get('id')}"
+        
+        if action == 'UPDATE':
+            if exception is not None:
+                return f"[ERROR] Error updating event: {str(exception)}"
+            return f"[OK] Event updated successfully!\n[LINK] Link: {response.get('htmlLink')}"
+        
+        if action == 'DELETE':
+            if exception is not None:
+                return f"[ERROR] Error deleting event: {str(exception)}"
+            return f"[OK] Event {op.get('event_id', '')} deleted successfully"
+        
+        return f"[ERROR] {str(exception)}"
+    
+    def batch_events(self, ops: List[Dict[str, str]]) -> List[str]:
+        """Run several calendar operations in batched HTTP requests, returning one result per op"""
+        results = [None] * len(ops)
+        
+        def on_response(request_id, response, exception):
+            i = int(request_id)
+            results[i] = self._event_result(ops[i], response, exception)
+        
+        for first in range(0, len(ops), CALENDAR_BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for i in range(first, min(first + CALENDAR_BATCH_SIZE, len(ops))):
+                try:
+                    batch.add(self._event_request(ops[i]), request_id=str(i))
+                except Exception as e:
+                    results[i] = self._event_result(ops[i], None, e)
+            try:
+                batch.execute()
+            except Exception as e:
+                for i in range(first, min(first + CALENDAR_BATCH_SIZE, len(ops))):
+                    if results[i] is None:
+                        results[i] = self._event_result(ops[i], None, e)
+        
+        # Any mutation makes the cached dashboard events stale. Clearing only once the
+        # batches have run keeps a concurrent read from re-caching the old list
+        self._dashboard_cache.clear()
+        return results
+    
+    def create_event(self, summary: str, start: str, end: str) -> str:
+        """Create a calendar event"""
+        return self.batch_events([{'action': 'CREATE', 'summary': summary, 'start': start, 'end': end}])[0]
+    
+    def update_event(self, event_id: str, summary: str = "", start: str = "", end: str = "") -> str:
+        """Update an existing calendar event"""
+        return self.batch_events([{'action': 'UPDATE', 'event_id': event_id, 'summary': summary, 'start': start, 'end': end}])[0]
+
+    def delete_event(self, event_id: str) -> str:
+        """Delete a calendar event"""
+        return self.batch_events([{'action': 'DELETE', 'event_id': event_id}])[0]
+    
+    def get_events(self, max_results: int = 10) -> str:
+        """Get upcoming events"""
+        try:
+            now = _iso_z(datetime.utcnow())
+            events_result = self.service.events().list(
+                calendarId='primary',
+                timeMin=now,
+                maxResults=max_results,
+                singleEvents=True,
+                orderBy='startTime',
+                fields=EVENT_LIST_FIELDS
+            ).execute()
+            
+            events = events_result.get('items', [])
+            if not events:
+                return "[EMPTY] No upcoming events found."
+            
+            parts = [f"[CALENDAR] Found {len(events)} upcoming event(s):\n\n"]
+            parts.extend(
+                f"[EVENT] {event['summary']}\n"
+                f"   Time: {event['start'].get('dateTime', event['start'].get('date'))}\n"
+                f"   ID: {event['id']}\n"
+                f"   Link: {event.get('htmlLink', 'No link')}\n\n"
+                for event in events
+            )
+            
+            return "".join(parts)
+        except Exception as e:
+            return f"[ERROR] Error getting events: {str(e)}"
+
+    def _sync_events(self):
+        """Bring the local event mirror up to date using Calendar incremental sync"""
+        now = datetime.now(timezone.utc)
+        if self._sync_token and now - self._sync_window_start >= SYNC_WINDOW_ROLLOVER:
+            # The window has moved on; rebuild the mirror for the new one
+            self._sync_token = None
+            self._events_cache.clear()
+        
+        while True:
+            params = {
+                'calendarId': 'primary',
+                'singleEvents': True,
+                'maxResults': SYNC_PAGE_SIZE,
+                'fields': EVENT_SYNC_FIELDS
+            }
+            if self._sync_token:
+                params['syncToken'] = self._sync_token
+            else:
+                # Full sync: only expand events inside the forward window
+                self._sync_window_start = now
+                params['timeMin'] = _iso_z(now.replace(tzinfo=None))
+                params['timeMax'] = _iso_z((now + SYNC_WINDOW).replace(tzinfo=None))
+            
+            try:
+                page_token = None
+                changed = []
+                while True:
+                    result = self.service.events().list(pageToken=page_token, **params).execute()
+                    changed.extend(result.get('items', []))
+                    page_token = result.get('nextPageToken')
+                    if not page_token:
+                        break
+            except HttpError as e:
+                # 410 Gone: the sync token expired, start over with a full sync
+                if e.resp.status == 410 and self._sync_token:
+                    self._sync_token = None
+                    self._events_cache.clear()
+                    continue
+                raise
+            
+            window_start = self._sync_window_start
+            window_end = window_start + SYNC_WINDOW
+            for event in changed:
+                # Incremental changes aren't limited to the window, so drop anything outside it
+                if (event.get('status') == 'cancelled'
+                        or _event_time(event['start']) >= window_end
+                        or _event_time(event['end']) <= window_start):
+                    self._events_cache.pop(event['id'], None)
+                else:
+                    self._events_cache[event['id']] = event
+            self._sync_token = result.get('nextSyncToken')
+            return
+    
+    def get_events_data(self, max_results: int = 5, fresh: bool = False) -> List[Dict[str, Any]]:
+        """Get raw event data for dashboard (cached briefly unless fresh is set)"""
+        if not fresh:
+            cached = self._dashboard_cache.get(max_results)
+            if cached is not None:
+                return cached
+        
+        try:
+            with self._sync_lock:
+                self._sync_events()
+                now = datetime.now(timezone.utc)
+                # Same semantics as events().list(timeMin=now): anything not yet over
+                upcoming = [e for e in self._events_cache.values() if _event_time(e['end']) > now]
+            
+            upcoming.sort(key=lambda e: _event_time(e['start']))
+            events = upcoming[:max_results]
+            self._dashboard_cache.set(max_results, events)
+            return events
+        except Exception:
+            logger.exception("fetching events failed")
+            return []
+
+
+# Main interface
+async def _read_input(prompt: str) -> str:
+    """Read a line on a daemon thread so the event loop keeps running while the user types"""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def reader():
+        try:
+            line = input(prompt)
+            loop.call_soon_threadsafe(future.set_result, line)
+        except Exception as e:
+            loop.call_soon_threadsafe(future.set_exception, e)
+    
+    threading.Thread(target=reader, daemon=True).start()
+    return await future
+
+async def main():
+    print("[BOT] Google Workspace Assistant Starting...")
+    print("=" * 50)
+    
+    try:
+        assistant = GoogleWorkspaceAgent()
+        
+        print("\n[OK] Ready! You can ask me to help with Gmail, Google Drive, or Google Calendar.")
+        print("\nExamples:")
+        print("  - 'Send an email to john@example.com about the meeting'")
+        print("  - 'Create a file called notes.txt with some content'")
+        print("  - 'Show me my upcoming calendar events'")
+        print("  - 'List my recent emails'")
+        print("\nType 'quit' to exit.\n")
+        
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            user_input = (await _read_input("You: ")).strip()
+            
+            if user_input.lower() in ['quit', 'exit', 'q']:
+                print("\n[BYE] Goodbye!")
+                break
+            
+            if not user_input:
+                continue
+            
+            print("\n[...] Processing...\n")
+            response = await loop.run_in_executor(None, assistant.process_request, user_input)
+            print(f"Assistant: {response['text']}\n")
+            print("-" * 50 + "\n")
+    
+    except Exception as e:
+        print(f"\n[ERROR] Error initializing assistant: {str(e)}")
+        print("\nMake sure:")
+        print("1. credentials.json is in the same directory")
+        print("2. You have enabled Gmail, Drive, and Calendar APIs")
+        print("3. pip install requests google-auth-oauthlib google-api-python-client")
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n\n[BYE] Goodbye!")
@@ -1,22 +1,76 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+import asyncio
+import hashlib
+import json
+import logging
+import queue
 import sys
 import os
 
-# Add current directory to path so we can import Friday1.0
+# Add current directory to path so we can import friday_agent
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import the agent
-# Note: We assume Friday1.0.py is in the same directory and has the class GoogleWorkspaceAgent
-# We rename the file import to avoid syntax errors if it has dots, but standard import works if name is valid
-# Since the file is named "Friday1.0.py", we might need to use importlib
-import importlib.util
-spec = importlib.util.spec_from_file_location("FridayAgent", "Friday1.0.py")
-friday_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(friday_module)
+from friday_agent import GoogleWorkspaceAgent
 
-app = FastAPI()
+# Agent log records are handed to a background listener thread, so request
+# threads never block on writing to the console
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+_agent_logger = logging.getLogger("friday_agent")
+_agent_logger.addHandler(QueueHandler(_log_queue))
+_agent_logger.setLevel(logging.INFO)
+_agent_logger.propagate = False
+
+# Dashboard data is refreshed in the background on this interval (seconds)
+DASHBOARD_REFRESH_INTERVAL = 15
+
+async def _refresh_dashboard_snapshot():
+    """Fetch Drive and Calendar data and swap in a new dashboard snapshot"""
+    # Drive and Calendar are independent, so fetch them concurrently off the event loop
+    files, events = await asyncio.gather(
+        run_in_threadpool(agent.drive_agent.get_files_data, fresh=True),
+        run_in_threadpool(agent.calendar_agent.get_events_data, fresh=True)
+    )
+    data = {"recent_files": files, "upcoming_events": events}
+    
+    # Unchanged data keeps the previous snapshot, so last_updated is when the data
+    # last changed and clients holding its ETag keep getting 304s
+    previous = app.state.dashboard_snapshot
+    if previous is not None and {k: v for k, v in previous[0].items() if k != "last_updated"} == data:
+        return
+    
+    data["last_updated"] = datetime.utcnow().isoformat() + "Z"
+    # The ETag is a hash of the exact body that is served
+    body = json.dumps(data, sort_keys=True).encode("utf-8")
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    app.state.dashboard_snapshot = (data, body, f'"{etag}"')
+
+async def _dashboard_refresh_loop():
+    while True:
+        try:
+            await _refresh_dashboard_snapshot()
+        except Exception as e:
+            print(f"[SERVER] Error refreshing dashboard data: {e}")
+        await asyncio.sleep(DASHBOARD_REFRESH_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _log_listener.start()
+    task = asyncio.create_task(_dashboard_refresh_loop()) if agent else None
+    yield
+    if task:
+        task.cancel()
+    _log_listener.stop()
+
+app = FastAPI(lifespan=lifespan)
+app.state.dashboard_snapshot = None
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -29,7 +83,7 @@ app.add_middleware(
 
 # Initialize the agent
 try:
-    agent = friday_module.GoogleWorkspaceAgent()
+    agent = GoogleWorkspaceAgent()
     print("[SERVER] Agent initialized successfully")
 except Exception as e:
     print(f"[SERVER] Error initializing agent: {e}")
@@ -50,39 +104,29 @@ def chat(request: ChatRequest):
     try:
         response = agent.process_request(request.message)
         
-        # Simple parsing to detect "Rich Cards" based on response text
-        # This is a basic implementation. Ideally, the agent should return structured data.
-        card_type = None
-        card_data = {}
-        
-        if "[EVENT]" in response or "created successfully" in response and "Event" in response:
-            card_type = "calendar_event"
-        elif "[FILE]" in response or "File" in response and "created" in response:
-            card_type = "drive_file"
-        elif "[EMAIL]" in response:
-            card_type = "email_list"
-            
+        # The agent tags each reply with the rich card to render
         return {
-            "response": response,
-            "card_type": card_type,
-            "card_data": card_data # Placeholder for now
+            "response": response["text"],
+            "card_type": response["card_type"],
+            "card_data": response["card_data"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/dashboard")
-def get_dashboard_data():
+async def get_dashboard_data(request: Request, fresh: bool = False):
     if not agent:
         raise HTTPException(status_code=500, detail="Agent not initialized")
     
     try:
-        files = agent.drive_agent.get_files_data()
-        events = agent.calendar_agent.get_events_data()
+        # Normally served straight from the background snapshot; no Google API calls here
+        if fresh or app.state.dashboard_snapshot is None:
+            await _refresh_dashboard_snapshot()
+        _, body, etag = app.state.dashboard_snapshot
         
-        return {
-            "recent_files": files,
-            "upcoming_events": events
-        }
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(body, media_type="application/json", headers={"ETag": etag})
     except Exception as e:
         print(f"[SERVER] Error fetching dashboard data: {e}")
         return {"recent_files": [], "upcoming_events": []}